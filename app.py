@@ -239,6 +239,7 @@ def play_move(game_id):
                         black_cost=game.black_cost,
                         termination=termination,
                     )
+                    ratings.flush()
                     log.debug(
                         f"Updated ratings: {game.white_player.name()} vs {game.black_player.name()} -> {result}"
                     )
@@ -279,7 +280,7 @@ def get_game_state(game_id):
     state = {
         "game_id": game_id,
         "is_over": game.is_over,
-        "fen": game.board.fen(),
+        "fen": game.fen,
         "result": game.game.headers.get("Result"),
         "termination": game.game.headers.get("Termination"),
         "white_time": game.white_time,
@@ -307,7 +308,7 @@ def stream_game_state(game_id):
         return {
             "game_id": game_id,
             "is_over": game.is_over,
-            "fen": game.board.fen(),
+            "fen": game.fen,
             "result": game.game.headers.get("Result"),
             "termination": game.game.headers.get("Termination"),
             "white_time": game.white_time,
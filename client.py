@@ -2,10 +2,11 @@
 
 import os
 import time
-import json
+import atexit
+import functools
 import httpx
-import requests
-from openai import OpenAI
+import orjson
+from openai import OpenAI, AsyncOpenAI
 
 from dotenv import load_dotenv
 from logger import log
@@ -22,6 +23,57 @@ if not GROK_API_KEY:
     raise RuntimeError("GROK_API_KEY not found in environment variables")
 MODELS_FILE = "models.txt"
 
+# Connections are shared by all LLM clients, so keep a few of them alive
+HTTP_LIMITS = httpx.Limits(
+    max_connections=50, max_keepalive_connections=20, keepalive_expiry=30
+)
+HTTP_TIMEOUT = httpx.Timeout(
+    connect=10,  # max to establish the connection
+    read=120,  # max between different chunks
+    write=10,  # max to send data
+    pool=600,  # max lifetime of the connection
+)
+
+
+@functools.lru_cache(maxsize=None)
+def get_http_client():
+    """Return the HTTP client shared by all LLM clients to reuse connections."""
+    http_client = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+    atexit.register(http_client.close)
+    return http_client
+
+
+@functools.lru_cache(maxsize=None)
+def get_async_http_client():
+    """Return the async HTTP client shared by all LLM clients.
+
+    It is bound to the running event loop: call close_async_http_client() before
+    the loop ends.
+    """
+    return httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+
+
+@functools.lru_cache(maxsize=None)
+def cacheable_system_message(content):
+    """Return a system message whose content is marked as a cacheable prefix.
+
+    Anthropic models only reuse a cached prompt prefix when it ends with a
+    cache_control breakpoint; the other providers cache long prefixes on their own.
+    """
+    return {
+        "role": "system",
+        "content": [
+            {"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}
+        ],
+    }
+
+
+async def close_async_http_client():
+    """Close the shared async HTTP client, if it was created."""
+    if get_async_http_client.cache_info().currsize:
+        await get_async_http_client().aclose()
+        get_async_http_client.cache_clear()
+
 
 class LLMClient:
     """LLM client. Selects the correct API key at call time.
@@ -47,6 +99,9 @@ class LLMClient:
         # self.env_grok_api_key = GROK_API_KEY  # not used anymore
         self.api_key = self.select_api_key()
         self.client = self.build_client()
+        # Created on first use: only the async tournament needs it
+        self.async_client = None
+        self.async_http_client = None
 
     def name(self):
         return self.model
@@ -75,35 +130,48 @@ class LLMClient:
             api_key = self.env_openrouter_api_key
         return api_key
 
-    def build_client(self):
+    def client_options(self):
         if self.model == "x-ai/grok-4":
-            client = OpenAI(
-                base_url="https://api.x.ai/v1",
-                api_key=self.api_key,
-                timeout=httpx.Timeout(
-                    connect=10,  # max to establish the connection
-                    read=120,  # max between different chunks
-                    write=10,  # max to send data
-                    pool=600,  # max lifetime of the connection
-                ),
-            )
+            base_url = "https://api.x.ai/v1"
         else:
-            client = OpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=self.api_key,
-                timeout=httpx.Timeout(
-                    connect=10,  # max to establish the connection
-                    read=120,  # max between different chunks
-                    write=10,  # max to send data
-                    pool=600,  # max lifetime of the connection
-                ),
+            base_url = "https://openrouter.ai/api/v1"
+        return {
+            "base_url": base_url,
+            "api_key": self.api_key,
+            "timeout": HTTP_TIMEOUT,
+        }
+
+    def build_client(self):
+        return OpenAI(http_client=get_http_client(), **self.client_options())
+
+    def get_async_client(self):
+        """Return the async client, built again if the shared HTTP client changed.
+
+        The shared async HTTP client is replaced after close_async_http_client().
+        """
+        http_client = get_async_http_client()
+        if self.async_http_client is not http_client:
+            self.async_client = AsyncOpenAI(
+                http_client=http_client, **self.client_options()
             )
-        return client
+            self.async_http_client = http_client
+        return self.async_client
 
     def get_openrouter_providers(self, model_to_call):
         headers = {"Authorization": f"Bearer {self.api_key}"}
         endpoints_url = f"https://openrouter.ai/api/v1/models/{model_to_call}/endpoints"
-        response = requests.get(endpoints_url, headers=headers, timeout=20)
+        response = get_http_client().get(endpoints_url, headers=headers, timeout=20)
+        return self.parse_openrouter_providers(model_to_call, response)
+
+    async def get_openrouter_providers_async(self, model_to_call):
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        endpoints_url = f"https://openrouter.ai/api/v1/models/{model_to_call}/endpoints"
+        response = await get_async_http_client().get(
+            endpoints_url, headers=headers, timeout=20
+        )
+        return self.parse_openrouter_providers(model_to_call, response)
+
+    def parse_openrouter_providers(self, model_to_call, response):
         if response.status_code == 200:
             data = response.json()
             providers = (data or {}).get("data", {}).get("endpoints", [])
@@ -122,26 +190,84 @@ class LLMClient:
             )
             return None
 
-    def chat(self, messages):
+    def get_model_to_call(self):
+        if self.model == "openai/gpt-5-high":  # high reasoning effort
+            return "openai/gpt-5"
+        elif self.model == "x-ai/grok-4":
+            return "grok-4"
+        return self.model
+
+    def build_extra_body(self, model_to_call, providers):
+        extra_body = {"usage": {"include": True}}
+        if self.model == "openai/gpt-5-high":
+            extra_body["reasoning"] = {"effort": "high"}
+
+        # Restrict to providers that support response_format for this model
+        if self.model != "x-ai/grok-4":
+            if providers:
+                extra_body["provider"] = {"only": providers}
+            else:
+                log.warning(
+                    f"No provider supports response_format for {model_to_call}. Proceeding without choosing a provider."
+                )
+        return extra_body
+
+    def build_response(self, content, last_chunk, latency):
+        """Return the response data from the streamed content, or None if empty."""
+        if not content:
+            log.warning(
+                f"No content received from {self.model} - Latency: {latency:.1f}s"
+            )
+            return None
         try:
-            extra_body = {"usage": {"include": True}}
-            if self.model == "openai/gpt-5-high":  # high reasoning effort
-                model_to_call = "openai/gpt-5"
-                extra_body["reasoning"] = {"effort": "high"}
-            elif self.model == "x-ai/grok-4":
-                model_to_call = "grok-4"
+            if self.model == "x-ai/grok-4":
+                cost = 0
+                total_cost, upstream_cost = 0, 0
+                # TODO: implement cost calculation for Grok 4
             else:
-                model_to_call = self.model
+                # Cost should be in the last chunk
+                cost = last_chunk.usage.cost
+                upstream_cost = (
+                    last_chunk.usage.cost_details.get("upstream_inference_cost") or 0
+                )
+                total_cost = cost + upstream_cost
+        except Exception as e:
+            log.warning(f"💰 Error getting cost from {self.model}: {e}")
+            total_cost, upstream_cost = 0, 0
+        try:
+            move = orjson.loads(content).get("choice")
+        except orjson.JSONDecodeError:  # reported by the game as invalid JSON
+            move = None
+        log.info(
+            f"Received response from {self.model} - Cost: {total_cost:.3f}€ (including {upstream_cost:.3f}€ upstream) - Latency: {latency:.1f}s - Move: {move}"
+        )
+        log.debug(f"Detailed response from {self.model}: {content}")
+        return {
+            "completion": content,
+            "cost": total_cost,
+            "latency": latency,
+        }
 
-            # Restrict to providers that support response_format for this model
+    def prepare_messages(self, messages):
+        """Mark the system prompt, identical for every move, as cacheable if needed."""
+        if self.model.startswith("anthropic/") and messages[0]["role"] == "system":
+            return [cacheable_system_message(messages[0]["content"]), *messages[1:]]
+        return messages
+
+    def handle_error(self, e):
+        if "401" in str(e):
+            raise RuntimeError(f"Authentication failed for {self.model}: {str(e)}")
+        log.error(f"Error getting response from {self.model}: {e}")
+        return None
+
+    def chat(self, messages):
+        try:
+            model_to_call = self.get_model_to_call()
+            providers = None
             if self.model != "x-ai/grok-4":
                 providers = self.get_openrouter_providers(model_to_call)
-                if providers:
-                    extra_body["provider"] = {"only": providers}
-                else:
-                    log.warning(
-                        f"No provider supports response_format for {model_to_call}. Proceeding without choosing a provider."
-                    )
+            extra_body = self.build_extra_body(model_to_call, providers)
+            messages = self.prepare_messages(messages)
             log.info(f"Sending request to {model_to_call}")
             log.debug(f"Detailed prompt sent to {model_to_call}: {messages}")
             start = time.time()
@@ -160,40 +286,40 @@ class LLMClient:
                 log.debug(f"Chunk {i} (last one): {chunk}")
             content = "".join(contents)
             log.debug(f"Final content: {content}")
-            latency = time.time() - start
-            if content:
-                try:
-                    if self.model == "x-ai/grok-4":
-                        cost = 0
-                        total_cost, upstream_cost = 0, 0
-                        # TODO: implement cost calculation for Grok 4
-                    else:
-                        # Cost should be in the last chunk
-                        cost = chunk.usage.cost
-                        upstream_cost = (
-                            chunk.usage.cost_details.get("upstream_inference_cost") or 0
-                        )
-                        total_cost = cost + upstream_cost
-                except Exception as e:
-                    log.warning(f"💰 Error getting cost from {self.model}: {e}")
-                    total_cost, upstream_cost = 0, 0
-                move = json.loads(content).get("choice")
-                log.info(
-                    f"Received response from {self.model} - Cost: {total_cost:.3f}€ (including {upstream_cost:.3f}€ upstream) - Latency: {latency:.1f}s - Move: {move}"
-                )
-                log.debug(f"Detailed response from {self.model}: {content}")
-                return {
-                    "completion": content,
-                    "cost": total_cost,
-                    "latency": latency,
-                }
-            else:
-                log.warning(
-                    f"No content received from {self.model} - Latency: {latency:.1f}s"
-                )
-                return None
+            return self.build_response(content, chunk, time.time() - start)
         except Exception as e:
-            if "401" in str(e):
-                raise RuntimeError(f"Authentication failed for {self.model}: {str(e)}")
-            log.error(f"Error getting response from {self.model}: {e}")
-            return None
+            return self.handle_error(e)
+
+    async def chat_async(self, messages):
+        """Async variant of chat, so that several games can wait on the API at once."""
+        try:
+            model_to_call = self.get_model_to_call()
+            providers = None
+            if self.model != "x-ai/grok-4":
+                providers = await self.get_openrouter_providers_async(model_to_call)
+            extra_body = self.build_extra_body(model_to_call, providers)
+            messages = self.prepare_messages(messages)
+            log.info(f"Sending request to {model_to_call}")
+            log.debug(f"Detailed prompt sent to {model_to_call}: {messages}")
+            start = time.time()
+            stream = await self.get_async_client().chat.completions.create(
+                model=model_to_call,
+                messages=messages,
+                response_format={"type": "json_schema", "json_schema": JSON_SCHEMA},
+                extra_body=extra_body,
+                stream=True,
+            )
+            async with stream:
+                contents = []
+                i = 0
+                async for chunk in stream:
+                    if i < 3 or i % 1000 == 0:
+                        log.debug(f"Chunk {i}: {chunk}")
+                    contents.append(chunk.choices[0].delta.content or "")
+                    i += 1
+                log.debug(f"Chunk {i - 1} (last one): {chunk}")
+            content = "".join(contents)
+            log.debug(f"Final content: {content}")
+            return self.build_response(content, chunk, time.time() - start)
+        except Exception as e:
+            return self.handle_error(e)
@@ -1,48 +1,87 @@
 """Google Cloud Storage utilities."""
 
-import json
+import gzip
+import atexit
+import orjson
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import storage
 
 GCS_BUCKET_NAME = "llm-chess-arena"
 
+# Uploads run in the background so that games don't wait on GCS
+upload_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gcs-upload")
+atexit.register(upload_executor.shutdown, wait=True)
+
+
+# Bucket handle of each thread, reused between calls (clients hold a connection
+# pool and should not be shared between threads)
+thread_local = threading.local()
+
 
 def get_gcs_bucket():
     """Get the GCS bucket."""
     try:
-        client = storage.Client()
-        return client.get_bucket(GCS_BUCKET_NAME)
+        bucket = getattr(thread_local, "bucket", None)
+        if bucket is None:
+            # bucket() makes no request, unlike get_bucket()
+            bucket = storage.Client().bucket(GCS_BUCKET_NAME)
+            thread_local.bucket = bucket
+        return bucket
     except Exception as e:
         print(f"Error connecting to GCS: {e}")
         return None
 
 
+# Content of the JSON files last read from GCS, with their generation
+json_cache = {}
+
+
 def read_json_from_gcs(blob_name):
-    """Read a JSON file from GCS."""
+    """Read a JSON file from GCS.
+
+    The content is cached with the generation of the blob: if the file did not
+    change since the last read, only its metadata is fetched.
+    """
     bucket = get_gcs_bucket()
     if not bucket:
         return {}
-    blob = bucket.blob(blob_name)
-    if not blob.exists():
-        return {}
     try:
-        json_data = blob.download_as_string()
-        return json.loads(json_data)
+        # First request to GCS: raises on permission or network errors
+        blob = bucket.get_blob(blob_name)  # None if the file doesn't exist
+        if blob is None:
+            return {}
+        cached = json_cache.get(blob_name)
+        if cached is not None and cached[0] == blob.generation:
+            json_data = cached[1]
+        else:
+            # Downloaded after the metadata, so never older than this generation
+            json_data = blob.download_as_bytes()
+            json_cache[blob_name] = (blob.generation, json_data)
+        # Parsed again on each read: callers modify the returned dict
+        return orjson.loads(json_data)
     except Exception as e:
         print(f"Error reading {blob_name} from GCS: {e}")
         return {}
 
 
-def write_json_to_gcs(blob_name, data):
-    """Write a JSON file to GCS."""
+def write_json_to_gcs(blob_name, data, compress=False):
+    """Write a JSON file to GCS.
+
+    With compress=True, the file is stored gzip-compressed. GCS and the client
+    library decompress it transparently when it is read.
+    """
     bucket = get_gcs_bucket()
     if not bucket:
         return
     blob = bucket.blob(blob_name)
     try:
-        blob.upload_from_string(
-            json.dumps(data, indent=2, ensure_ascii=False),
-            content_type="application/json",
-        )
+        # Same layout as json.dumps(indent=2), non-ASCII text is kept as is
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        if compress:
+            payload = gzip.compress(payload)
+            blob.content_encoding = "gzip"
+        blob.upload_from_string(payload, content_type="application/json")
         print(f"Successfully wrote to {blob_name} in GCS bucket {GCS_BUCKET_NAME}.")
     except Exception as e:
         print(f"Error writing {blob_name} to GCS: {e}")
@@ -61,3 +100,12 @@ def write_file_to_gcs(blob_name, data, content_type="text/plain"):
         )
     except Exception as e:
         print(f"Error writing file {blob_name} to GCS: {e}")
+
+
+def write_in_background(write_function, *args, **kwargs):
+    """Run a GCS write function in the background uploader.
+
+    Write functions already log their own errors, so the returned future can be
+    ignored.
+    """
+    return upload_executor.submit(write_function, *args, **kwargs)
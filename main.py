@@ -1,16 +1,41 @@
 """Run a small tournament between models and print the final Elo table."""
 
 import argparse
+import asyncio
 import random
 from dotenv import load_dotenv
 
 from match import ChessGame
-from client import OpenRouterClient
+from client import LLMClient, close_async_http_client
 from ratings import RatingsTable
 from utils import read_models_from_file
 
 
 MODELS_FILE = "models.txt"
+# Games played at the same time: more would only wait for a free HTTP connection
+MAX_CONCURRENT_GAMES = 20
+
+
+async def play_game(game, semaphore, max_retries=2):
+    """Play a game once the semaphore lets it start."""
+    async with semaphore:
+        return await game.play_async(max_retries)
+
+
+async def play_games(games, max_retries=2):
+    """Play the games concurrently and return their results in order.
+
+    A game that raised returns its exception instead: it doesn't cancel the
+    other games.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_GAMES)
+    try:
+        return await asyncio.gather(
+            *(play_game(game, semaphore, max_retries) for game in games),
+            return_exceptions=True,
+        )
+    finally:
+        await close_async_http_client()
 
 
 def run_tournament(models, total_matches):
@@ -25,25 +50,31 @@ def run_tournament(models, total_matches):
 
     model_ids = [m["id"] for m in models]
 
+    games = []
     for i in range(total_matches):
         # Randomly select two models
         white_model, black_model = random.sample(model_ids, 2)
         print(f"\nGame n°{i + 1}: {white_model} (White) vs {black_model} (Black)")
 
         # Create clients
-        white = OpenRouterClient(white_model)
-        black = OpenRouterClient(black_model)
+        white = LLMClient(white_model)
+        black = LLMClient(black_model)
+        games.append(ChessGame(white, black, upload_in_background=True))
 
-        # Play game
-        game = ChessGame(white, black)
-        game_data = game.play(max_retries=2)
+    # Play games concurrently: each one mostly waits on the API
+    games_data = asyncio.run(play_games(games, max_retries=2))
+
+    for i, (game, game_data) in enumerate(zip(games, games_data)):
+        if isinstance(game_data, Exception):
+            print(f"Game n°{i + 1} failed: {game_data!r}")
+            continue
         result = game_data["result"]
         print(f"Game n°{i + 1} result: {result}")
 
         # Update ratings with statistics
         ratings.apply_result(
-            white_model,
-            black_model,
+            game.white_player.name(),
+            game.black_player.name(),
             result,
             white_moves=game_data["white_moves"],
             black_moves=game_data["black_moves"],
@@ -54,6 +85,9 @@ def run_tournament(models, total_matches):
             termination=game.game.headers.get("Termination"),
         )
 
+    # Write all the results at once
+    ratings.flush()
+
     # Print final ratings
     print("\nFinal ELO ratings:")
     for model in ratings.ratings:
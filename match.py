@@ -1,33 +1,101 @@
 """Play a chess game."""
 
-import io
 import time
+import asyncio
+from collections import namedtuple
 
 import chess
 import chess.pgn
-import json
+import orjson
 from prompts import (
     SYSTEM_PROMPT,
     build_user_prompt,
     RetryReason,
+    is_valid_uci,
     build_retry_message,
 )
-from gcp import write_file_to_gcs, write_json_to_gcs
+from gcp import write_file_to_gcs, write_json_to_gcs, write_in_background
 from logger import log
 
+# Errors in the structure of the JSON response, not in the move itself
+FORMAT_ERRORS = frozenset(
+    {
+        RetryReason.INVALID_JSON,
+        RetryReason.MISSING_ANALYSIS_KEY,
+        RetryReason.MISSING_BREAKDOWN_KEY,
+        RetryReason.MISSING_CHOICE_KEY,
+    }
+)
+
+# Shared by every conversation, never mutated
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+# Introduces the position restated after a move error
+RETRY_REMINDER = "\n\nAs a reminder, here is the current situation:"
+
+# Move parsed from a completion, or the RetryReason why it could not be
+ParsedResponse = namedtuple(
+    "ParsedResponse",
+    ["move", "move_uci", "rationale", "reasoning", "error", "attempted"],
+    defaults=[None] * 6,
+)
+
+# Move chosen by a player, or the RetryReason why none could be played
+MoveResult = namedtuple(
+    "MoveResult",
+    ["move", "rationale", "reasoning", "cost", "latency", "error"],
+    defaults=[None, None, None, 0, 0, None],
+)
+
+
+class MoveAttempts:
+    """Attempts of a player to make a move: conversation, counters and totals."""
+
+    def __init__(self, messages, legal_moves, max_retries, max_empty_retries):
+        self.messages = messages
+        self.legal_moves = legal_moves
+        self.max_retries = max_retries
+        self.max_empty_retries = max_empty_retries
+        self.attempts = 0
+        self.empty_attempts = 0
+        self.total_cost = 0.0
+        self.total_latency = 0.0
+
+    def failure(self, error, **kwargs):
+        """Return the MoveResult of a failure, with the totals of all attempts."""
+        return MoveResult(
+            cost=self.total_cost, latency=self.total_latency, error=error, **kwargs
+        )
+
 
 class ChessGame:
     """Single chess game between two players."""
 
-    def __init__(self, white_player, black_player, max_moves=200, pgn_dir="games"):
-        """Initialize a new chess game."""
+    def __init__(
+        self,
+        white_player,
+        black_player,
+        max_moves=200,
+        pgn_dir="games",
+        upload_in_background=False,
+    ):
+        """Initialize a new chess game.
+
+        With upload_in_background=True, the finished game is uploaded without
+        blocking the caller (for the async tournament, whose event loop must not
+        wait on GCS). The web app uploads before responding instead: Cloud Run
+        throttles the CPU once the response is sent.
+        """
         self.white_player = white_player
         self.black_player = black_player
         self.max_moves = max_moves
         self.pgn_dir = pgn_dir
+        self.upload_in_background = upload_in_background
 
         # Initialize game state
         self.board = chess.Board()
+        # FEN of the current position, refreshed after each move
+        self.fen = self.board.fen()
         self.game = chess.pgn.Game()
         self.node = self.game
 
@@ -53,46 +121,46 @@ class ChessGame:
         """Extract the move from the response.
 
         Returns:
-            dict: Either {"move": chess.Move or "resign", "rationale": string, "reasoning": string} for success
-                or {"error": RetryReason} for failure
+            ParsedResponse: move (chess.Move or "resign"), move_uci, rationale and
+                reasoning for success, or error (RetryReason) and attempted for failure
         """
         if not response:
-            return {"error": RetryReason.EMPTY_RESPONSE}
+            return ParsedResponse(error=RetryReason.EMPTY_RESPONSE)
         try:
-            parsed_response = json.loads(response)
-        except json.JSONDecodeError:
+            parsed_response = orjson.loads(response)
+        except orjson.JSONDecodeError:
             log.warning(f"Error parsing response: {response}")
-            return {"error": RetryReason.INVALID_JSON}
+            return ParsedResponse(error=RetryReason.INVALID_JSON)
 
         if "analysis" not in parsed_response:
             log.warning(f"Missing 'analysis' key in response: {parsed_response}")
-            return {"error": RetryReason.MISSING_ANALYSIS_KEY}
+            return ParsedResponse(error=RetryReason.MISSING_ANALYSIS_KEY)
         if "breakdown" not in parsed_response:
             log.warning(f"Missing 'breakdown' key in response: {parsed_response}")
-            return {"error": RetryReason.MISSING_BREAKDOWN_KEY}
+            return ParsedResponse(error=RetryReason.MISSING_BREAKDOWN_KEY)
         if "choice" not in parsed_response:
             log.warning(f"Missing 'choice' key in response: {parsed_response}")
-            return {"error": RetryReason.MISSING_CHOICE_KEY}
-
+            return ParsedResponse(error=RetryReason.MISSING_CHOICE_KEY)
+
+        move_str = parsed_response["choice"].strip()
+        rationale = parsed_response.get("breakdown", "No rationale provided.")
+        reasoning = parsed_response.get("analysis", "No reasoning provided.")
+        if move_str == "resign":
+            return ParsedResponse(move_str, rationale=rationale, reasoning=reasoning)
+        # Reject malformed moves before python-chess raises on them
+        if not is_valid_uci(move_str):
+            log.warning(f"Error parsing UCI move: {move_str}")
+            return ParsedResponse(
+                error=RetryReason.INVALID_UCI_FORMAT, attempted=move_str
+            )
         try:
-            move_str = parsed_response["choice"].strip()
-            rationale = parsed_response.get("breakdown", "No rationale provided.")
-            reasoning = parsed_response.get("analysis", "No reasoning provided.")
-            if move_str == "resign":
-                return {
-                    "move": move_str,
-                    "rationale": rationale,
-                    "reasoning": reasoning,
-                }
-            return {
-                "move": chess.Move.from_uci(move_str),
-                "move_uci": move_str,
-                "rationale": rationale,
-                "reasoning": reasoning,
-            }
-        except ValueError:
+            move = chess.Move.from_uci(move_str)
+        except ValueError:  # e.g. same from-square and to-square
             log.warning(f"Error parsing UCI move: {move_str}")
-            return {"error": RetryReason.INVALID_UCI_FORMAT, "attempted": move_str}
+            return ParsedResponse(
+                error=RetryReason.INVALID_UCI_FORMAT, attempted=move_str
+            )
+        return ParsedResponse(move, move_str, rationale, reasoning)
 
     def terminate_game(self, result, termination_reason):
         """Set game result and termination reason."""
@@ -106,131 +174,187 @@ class ChessGame:
         else:
             self.terminate_game("1-0", reason)
 
-    def get_player_move(self, player, max_retries=2, max_empty_retries=3):
-        """Get a move from the specified player with retry logic.
+    def build_messages(self):
+        """Build a fresh conversation for the current move."""
+        return [
+            SYSTEM_MESSAGE,
+            {"role": "user", "content": build_user_prompt(self.board)},
+        ]
 
-        Empty responses do not count against max_retries, but are capped by
-        max_empty_retries to avoid infinite loops.
+    def check_completion(self, completion, legal_moves):
+        """Check the move proposed in a completion against the set of legal moves.
+
+        Returns:
+            tuple: (result, error_reason, attempted) where result is the MoveResult
+                if the move can be played, None otherwise.
         """
+        parsed = self.extract_move_from_response(completion)
+        if parsed.error is None:
+            move = parsed.move
+            # Check if the piece belongs to the right player
+            if isinstance(move, chess.Move):
+                piece = self.board.piece_at(move.from_square)
+                if piece and piece.color != self.board.turn:
+                    error_reason = RetryReason.ILLEGAL_MOVE_WRONG_PIECE
+                    attempted = parsed.move_uci
+                else:
+                    error_reason = RetryReason.ILLEGAL_MOVE
+            # Check if move is legal
+            if move == "resign" or move in legal_moves:
+                return MoveResult(move, parsed.rationale, parsed.reasoning), None, None
+            if self.board.is_legal(move):
+                # King-takes-rook castling (e.g. e1h1) is legal but generated as the
+                # king move (e1g1): play the generated move
+                move = self.board.parse_uci(parsed.move_uci)
+                return MoveResult(move, parsed.rationale, parsed.reasoning), None, None
+            error_reason = RetryReason.ILLEGAL_MOVE
+            attempted = parsed.move_uci
+        else:
+            error_reason = parsed.error
+            attempted = parsed.attempted
+        return None, error_reason, attempted
 
-        # Build a fresh conversation for this move
-        messages = [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": build_user_prompt(self.board)},
-        ]
+    def build_retry_prompt(self, error_reason, attempted, user_prompt=None):
+        """Return the user message asking the player to try again.
+
+        Format errors only need the format to be fixed: the position is still in
+        the first user message, so it is not repeated, and the structure is
+        already enforced by the JSON schema, so a compact message is enough.
+        user_prompt can be given to reuse the prompt already built for this move.
+        """
+        is_format_error = error_reason in FORMAT_ERRORS
+        content = build_retry_message(
+            error_reason,
+            attempted,
+            is_in_check=self.board.is_check(),
+            compact=is_format_error,
+        )
+        if not is_format_error:
+            if user_prompt is None:
+                user_prompt = build_user_prompt(self.board)
+            content += RETRY_REMINDER + user_prompt
+        return {"role": "user", "content": content}
+
+    def start_move_attempts(self, max_retries, max_empty_retries, legal_moves=None):
+        """Return the state of the attempts of the current player to make a move."""
+        # Generated once per turn and reused across retries
+        if legal_moves is None:
+            legal_moves = frozenset(self.board.legal_moves)
+        return MoveAttempts(
+            self.build_messages(), legal_moves, max_retries, max_empty_retries
+        )
 
-        attempts = 0
-        empty_attempts = 0
-        total_cost = 0.0
-        total_latency = 0.0
+    def handle_response(self, player, state, response_data):
+        """Process a response of the player to state.messages.
+
+        Returns the result of the move, or of the failure if no attempt is left,
+        or None if the player must be asked again with state.messages.
+        """
+        # Handle case where chat returns None (empty response, free retry)
+        if not response_data:
+            log.warning(f"⚠️ Empty response from {player.name()} - Waiting 2 seconds...")
+            return self.count_empty_response(state)
+
+        completion = response_data["completion"]
+        # Accumulate totals across attempts
+        state.total_cost += response_data.get("cost", 0)
+        state.total_latency += response_data.get("latency", 0)
+        if not completion:
+            log.warning(f"⚠️ Empty response from {player.name()}")
+            return self.count_empty_response(state)
+
+        # Extract the move from the response
+        result, error_reason, attempted = self.check_completion(
+            completion, state.legal_moves
+        )
+        if result:
+            return result._replace(cost=state.total_cost, latency=state.total_latency)
+        log.warning(f"⚠️ Error on this move: {error_reason.name}")
+
+        # Count this as a real attempt (non-empty response but invalid)
+        state.attempts += 1
+        if state.attempts > state.max_retries:
+            # All attempts failed: the retry message would never be sent
+            return state.failure(error_reason)
+
+        # Replace the previous attempt, if any, by this one and the error reason:
+        # the retry message restates the position, so older failed attempts would
+        # only grow the prompt
+        messages = state.messages
+        messages[2:] = (
+            {"role": "assistant", "content": completion},
+            self.build_retry_prompt(
+                error_reason, attempted, user_prompt=messages[1]["content"]
+            ),
+        )
+        return None
+
+    def count_empty_response(self, state):
+        """Count an empty response, and return the failure if there were too many."""
+        state.empty_attempts += 1
+        if state.empty_attempts > state.max_empty_retries:
+            return state.failure(RetryReason.EMPTY_RESPONSE)
+        return None
+
+    def get_player_move(
+        self, player, max_retries=2, max_empty_retries=3, legal_moves=None
+    ):
+        """Get a move from the specified player with retry logic.
 
-        while attempts <= max_retries:
+        Empty responses do not count against max_retries, but are capped by
+        max_empty_retries to avoid infinite loops.
+        legal_moves can be given if the caller already generated them.
+        """
+        state = self.start_move_attempts(max_retries, max_empty_retries, legal_moves)
+        while True:
             log.debug(
-                f"Attempt {attempts + 1}/{1 + max_retries} for {player.name()}..."
+                f"Attempt {state.attempts + 1}/{1 + max_retries} for {player.name()}..."
             )
             try:
-                response_data = player.chat(messages)
+                response_data = player.chat(state.messages)
             except RuntimeError as e:  # authentication error = stop immediately
-                return {
-                    "error": RetryReason.AUTHENTICATION_FAILED,
-                    "rationale": str(e),
-                    "reasoning": "",
-                    "cost": total_cost,
-                    "latency": total_latency,
-                }
-
-            # Handle case where chat returns None (empty response, free retry)
-            if not response_data:
-                error_reason = RetryReason.EMPTY_RESPONSE
-                log.warning(
-                    f"⚠️ Empty response from {player.name()} - Waiting 2 seconds..."
+                return state.failure(
+                    RetryReason.AUTHENTICATION_FAILED, rationale=str(e), reasoning=""
                 )
+            result = self.handle_response(player, state, response_data)
+            if result is not None:
+                return result
+            if not response_data:
                 time.sleep(2)
-                empty_attempts += 1
-                if empty_attempts > max_empty_retries:
-                    return {
-                        "error": error_reason,
-                        "cost": total_cost,
-                        "latency": total_latency,
-                    }
-                continue
-
-            completion = response_data["completion"]
-            cost = response_data.get("cost", 0)
-            latency = response_data.get("latency", 0)
-            # Accumulate totals across attempts
-            total_cost += cost
-            total_latency += latency
-            if completion:
-                messages.append({"role": "assistant", "content": completion})
-            else:
-                log.warning(f"⚠️ Empty response from {player.name()}")
-                error_reason = RetryReason.EMPTY_RESPONSE
-                empty_attempts += 1
-                if empty_attempts > max_empty_retries:
-                    return {
-                        "error": error_reason,
-                        "cost": total_cost,
-                        "latency": total_latency,
-                    }
-                continue
-
-            # Extract the move from the response
-            result = self.extract_move_from_response(completion)
-            if "move" in result:
-                move = result["move"]
-                # Check if the piece belongs to the right player
-                if isinstance(move, chess.Move):
-                    piece = self.board.piece_at(move.from_square)
-                    if piece and piece.color != self.board.turn:
-                        error_reason = RetryReason.ILLEGAL_MOVE_WRONG_PIECE
-                        attempted = result.get("move_uci")
-                    else:
-                        error_reason = RetryReason.ILLEGAL_MOVE
-                # Check if move is legal
-                if move == "resign" or move in self.board.legal_moves:
-                    return {
-                        "move": move,
-                        "rationale": result.get("rationale"),
-                        "reasoning": result.get("reasoning"),
-                        "cost": total_cost,
-                        "latency": total_latency,
-                    }
-                else:
-                    error_reason = RetryReason.ILLEGAL_MOVE
-                    attempted = result.get("move_uci")
-            else:
-                error_reason = result["error"]
-                attempted = result.get("attempted")
-            log.warning(f"⚠️ Error on this move: {error_reason}")
-
-            # Count this as a real attempt (non-empty response but invalid)
-            attempts += 1
-
-            # Add error reason to the conversation
-            messages.append(
-                {
-                    "role": "user",
-                    "content": build_retry_message(
-                        error_reason, attempted, is_in_check=self.board.is_check()
-                    )
-                    + "\n\n"
-                    + "As a reminder, here is the current situation:"
-                    + build_user_prompt(self.board),
-                }
+
+    async def get_player_move_async(
+        self, player, max_retries=2, max_empty_retries=3, legal_moves=None
+    ):
+        """Async variant of get_player_move, awaiting player.chat_async."""
+        state = self.start_move_attempts(max_retries, max_empty_retries, legal_moves)
+        while True:
+            log.debug(
+                f"Attempt {state.attempts + 1}/{1 + max_retries} for {player.name()}..."
             )
+            try:
+                response_data = await player.chat_async(state.messages)
+            except RuntimeError as e:  # authentication error = stop immediately
+                return state.failure(
+                    RetryReason.AUTHENTICATION_FAILED, rationale=str(e), reasoning=""
+                )
+            result = self.handle_response(player, state, response_data)
+            if result is not None:
+                return result
+            if not response_data:
+                await asyncio.sleep(2)
 
-        # All attempts failed
-        return {"error": error_reason, "cost": total_cost, "latency": total_latency}
+    def determine_game_result(self, outcome=None):
+        """Determine the final result if the game ended naturally.
 
-    def determine_game_result(self):
-        """Determine the final result if the game ended naturally."""
-        if self.board.is_game_over(claim_draw=False):
-            result = self.board.result(claim_draw=False)
-            self.game.headers["Result"] = result
-            if self.board.is_checkmate():
+        outcome can be given if board.outcome() was already computed.
+        """
+        if outcome is None:
+            outcome = self.board.outcome(claim_draw=False)
+        if outcome:
+            self.game.headers["Result"] = outcome.result()
+            if outcome.termination == chess.Termination.CHECKMATE:
                 self.game.headers["Termination"] = "checkmate"
-            elif self.board.is_stalemate():
+            elif outcome.termination == chess.Termination.STALEMATE:
                 self.game.headers["Termination"] = "stalemate"
             else:
                 self.game.headers["Termination"] = "draw"
@@ -238,16 +362,23 @@ class ChessGame:
             log.info(
                 f"Game ended. result={self.game.headers['Result']}, termination={self.game.headers['Termination']}, "
                 f"fullmove={self.board.fullmove_number}, halfmove={self.board.halfmove_clock}, "
-                f"fen={self.board.fen()}"
+                f"fen={self.fen}"
             )
         else:
             # Game ended due to move limit
             self.game.headers["Result"] = "1/2-1/2"
             self.game.headers["Termination"] = "exceeded moves limit"
             log.info(
-                f"Game ended without is_game_over. Assuming move limit. fullmove={self.board.fullmove_number}, max_moves={self.max_moves}, fen={self.board.fen()}"
+                f"Game ended without is_game_over. Assuming move limit. fullmove={self.board.fullmove_number}, max_moves={self.max_moves}, fen={self.fen}"
             )
 
+    def upload(self, write_function, *args, **kwargs):
+        """Run a GCS write function, in the background if the game was set up so."""
+        if self.upload_in_background:
+            write_in_background(write_function, *args, **kwargs)
+        else:
+            write_function(*args, **kwargs)
+
     def save_game(self):
         """Save game to PGN and JSON."""
         timestamp = time.time_ns()
@@ -258,12 +389,12 @@ class ChessGame:
         # Save PGN
         pgn_filename = f"{base_filename}.pgn"
         pgn_blob_name = f"{self.pgn_dir}/{pgn_filename}"
-        pgn_io = io.StringIO()
-        exporter = chess.pgn.FileExporter(pgn_io)
-        self.game.accept(exporter)
-        pgn_text = pgn_io.getvalue()
-        write_file_to_gcs(
-            pgn_blob_name, pgn_text, content_type="application/x-chess-pgn"
+        pgn_text = self.game.accept(chess.pgn.StringExporter())
+        self.upload(
+            write_file_to_gcs,
+            pgn_blob_name,
+            pgn_text,
+            content_type="application/x-chess-pgn",
         )
 
         # Save JSON data
@@ -283,7 +414,7 @@ class ChessGame:
         }
         json_filename = f"{base_filename}.json"
         json_blob_name = f"{self.pgn_dir}/{json_filename}"
-        write_json_to_gcs(json_blob_name, game_data)
+        self.upload(write_json_to_gcs, json_blob_name, game_data)
 
     def get_current_player(self):
         """Return the player whose turn it is."""
@@ -291,31 +422,74 @@ class ChessGame:
             self.white_player if self.board.turn == chess.WHITE else self.black_player
         )
 
-    def play_next_move(self, max_retries=2):
-        """Play one move and return the result.
+    def get_forced_move(self, legal_moves):
+        """Return the move result if only one move is legal, None otherwise.
 
-        Returns a dictionary with move info, or None if game is over.
+        There is nothing to choose, so the player is not asked.
         """
-        if (
-            self.is_over
-            or self.board.is_game_over(claim_draw=False)
-            or self.board.fullmove_number > self.max_moves
-        ):
+        if len(legal_moves) != 1:
+            return None
+        (move,) = legal_moves
+        log.info(f"Only one legal move ({move.uci()}), playing it without asking.")
+        return MoveResult(
+            move, "Forced move.", "Only one legal move available.", cost=0, latency=0
+        )
+
+    def end_game_if_over(self):
+        """Close the game if no more moves can be played. Returns True if it is over."""
+        # Positions reached by a move are checked right after it is played
+        if self.is_over or self.board.fullmove_number > self.max_moves:
             self.is_over = True
-            if "Result" not in self.game.headers:
+            # "Result" is always in the headers ("*" until the game ends)
+            if "Termination" not in self.game.headers:
                 self.determine_game_result()
             self.save_game()
+            return True
+        return False
+
+    def play_next_move(self, max_retries=2):
+        """Play one move and return the result.
+
+        Returns a dictionary with move info, or None if game is over.
+        """
+        if self.end_game_if_over():
             return None
 
         player = self.get_current_player()
-        mover_color = "white" if self.board.turn == chess.WHITE else "black"
-        result = self.get_player_move(player, max_retries)
+        legal_moves = frozenset(self.board.legal_moves)
+        result = self.get_forced_move(legal_moves)
+        if result is None:
+            result = self.get_player_move(player, max_retries, legal_moves=legal_moves)
+        return self.apply_player_move(player, result)
+
+    async def play_next_move_async(self, max_retries=2):
+        """Async variant of play_next_move."""
+        if self.end_game_if_over():
+            return None
 
-        if "error" in result:
+        player = self.get_current_player()
+        legal_moves = frozenset(self.board.legal_moves)
+        result = self.get_forced_move(legal_moves)
+        if result is None:
+            result = await self.get_player_move_async(
+                player, max_retries, legal_moves=legal_moves
+            )
+        return self.apply_player_move(player, result)
+
+    def apply_player_move(self, player, result):
+        """Apply the result of get_player_move to the game and return the move info."""
+        turn = self.board.turn
+        mover_color = "white" if turn == chess.WHITE else "black"
+
+        if result.error is not None:
             # Count the time and cost spent on all attempts for this failed move
-            fail_cost = result.get("cost", 0)
-            fail_latency = result.get("latency", 0)
-            if self.board.turn == chess.WHITE:
+            fail_cost = result.cost
+            fail_latency = result.latency
+            rationale = result.rationale
+            if rationale is None:
+                rationale = result.error.message
+            reasoning = result.reasoning or ""
+            if turn == chess.WHITE:
                 self.white_time += fail_latency
                 self.white_cost += fail_cost
             else:
@@ -324,61 +498,59 @@ class ChessGame:
             # Add a final move entry to moves_log so UI can show Disqualified as a move
             disq_entry = {
                 "player": player.name(),
-                "color": "White" if self.board.turn == chess.WHITE else "Black",
+                "color": "White" if turn == chess.WHITE else "Black",
                 "move_number": self.board.fullmove_number,
-                "fen_before": self.board.fen(),
-                "reasoning": result.get("reasoning", ""),
-                "rationale": result.get("rationale", result["error"].value),
+                "fen_before": self.fen,
+                "reasoning": reasoning,
+                "rationale": rationale,
                 "cost": fail_cost,
                 "latency": fail_latency,
                 "move": "Disqualified",
             }
             self.moves_log.append(disq_entry)
 
-            self.resign(self.board.turn, result["error"].value)
+            self.resign(turn, result.error.message)
             self.is_over = True
             self.save_game()
             return {
                 "status": "error",
                 "message": "Player failed to move.",
                 "move_san": "resign",
-                "fen": self.board.fen(),
+                "fen": self.fen,
                 "is_over": True,
                 "result": self.game.headers.get("Result"),
                 "color": mover_color,
-                "rationale": result.get("rationale", result["error"].value),
-                "reasoning": result.get("reasoning", ""),
+                "rationale": rationale,
+                "reasoning": reasoning,
                 "cost": fail_cost,
                 "latency": fail_latency,
                 "move_number": self.board.fullmove_number,
             }
 
         # Extract all data from the result
-        move = result["move"]
-        rationale = result.get("rationale", "No rationale provided.")
-        reasoning = result.get("reasoning", "No reasoning provided.")
-        cost = result.get("cost", 0)
-        latency = result.get("latency", 0)
+        move, rationale, reasoning, cost, latency, _ = result
 
         # Log move data for JSON export
         move_log_entry = {
             "player": player.name(),
-            "color": "White" if self.board.turn == chess.WHITE else "Black",
+            "color": "White" if turn == chess.WHITE else "Black",
             "move_number": self.board.fullmove_number,
-            "fen_before": self.board.fen(),
+            "fen_before": self.fen,
             "reasoning": reasoning,
             "rationale": rationale,
             "cost": cost,
             "latency": latency,
         }
         if isinstance(move, chess.Move):
-            move_log_entry["move"] = {"uci": move.uci(), "san": self.board.san(move)}
+            # SAN needs the position before the move: compute it once for both uses
+            san_move = self.board.san(move)
+            move_log_entry["move"] = {"uci": move.uci(), "san": san_move}
         else:
             move_log_entry["move"] = move
         self.moves_log.append(move_log_entry)
 
         # Track statistics for the current move, regardless of what the move is
-        if self.board.turn == chess.WHITE:
+        if turn == chess.WHITE:
             self.white_time += latency
             self.white_cost += cost
         else:
@@ -386,13 +558,13 @@ class ChessGame:
             self.black_cost += cost
 
         if move == "resign":
-            self.resign(self.board.turn, "Resigned")
+            self.resign(turn, "Resigned")
             self.is_over = True
             self.save_game()
             return {
                 "status": "resigned",
                 "move_san": "resign",
-                "fen": self.board.fen(),
+                "fen": self.fen,
                 "is_over": self.is_over,
                 "result": self.game.headers.get("Result"),
                 "color": mover_color,
@@ -404,22 +576,23 @@ class ChessGame:
             }
 
         # If it is a standard move, we can make it
-        san_move = self.board.san(move)
         move_number = self.board.fullmove_number
         self.board.push(move)
+        self.fen = self.board.fen()
         self.node = self.node.add_variation(move)
 
         # Check for game over condition after the move
-        if self.board.is_game_over(claim_draw=False):
+        outcome = self.board.outcome(claim_draw=False)
+        if outcome:
             self.is_over = True
-            self.determine_game_result()
+            self.determine_game_result(outcome)
             self.save_game()
 
         return {
             "status": "success",
             "move_san": san_move,
             "move_uci": move.uci(),
-            "fen": self.board.fen(),
+            "fen": self.fen,
             "is_over": self.is_over,
             "result": self.game.headers.get("Result"),
             "color": mover_color,
@@ -436,7 +609,18 @@ class ChessGame:
             move_result = self.play_next_move(max_retries)
             if move_result is None:  # Game ended
                 break
+        return self.summarize()
+
+    async def play_async(self, max_retries=2):
+        """Async variant of play, to run several games concurrently."""
+        while not self.is_over:
+            move_result = await self.play_next_move_async(max_retries)
+            if move_result is None:  # Game ended
+                break
+        return self.summarize()
 
+    def summarize(self):
+        """Return the result and statistics of a finished game."""
         # Calculate moves: total moves divided by 2, white gets the extra if odd
         total_moves = len(self.board.move_stack)
         white_moves = (total_moves + 1) // 2  # White moves first, so gets extra if odd
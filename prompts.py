@@ -1,7 +1,11 @@
 """Prompts for the LLM."""
 
+import re
 import chess
-from enum import Enum
+import functools
+import string
+from enum import IntEnum
+from operator import attrgetter
 
 
 JSON_SCHEMA = {
@@ -29,66 +33,88 @@ JSON_SCHEMA = {
 }
 
 
-class RetryReason(Enum):
-    """Enumeration of retry reasons with custom messages."""
+# A move in UCI format: from-square, to-square and optional promotion piece
+UCI_RE = re.compile("[a-h][1-8][a-h][1-8][qrbn]?")
+# Anchored form, shown to the models
+UCI_PATTERN = f"^{UCI_RE.pattern}$"
 
-    EMPTY_RESPONSE = "No response from the model."
-    INVALID_JSON = "The model didn't return a valid response."
-    ILLEGAL_MOVE = "The model only proposed illegal moves."
-    ILLEGAL_MOVE_WRONG_PIECE = "The model tried to move a piece of the wrong color."
-    MISSING_CHOICE_KEY = "The model didn't return a valid response."
-    MISSING_BREAKDOWN_KEY = "The model didn't return a valid response."
-    MISSING_ANALYSIS_KEY = "The model didn't return a valid response."
-    INVALID_UCI_FORMAT = "The model didn't respected the imposed response format."
-    AUTHENTICATION_FAILED = "Authentication failed. Please verify your API keys."
 
+def is_valid_uci(move_str):
+    """Return True if the whole string is a move in UCI format."""
+    return UCI_RE.fullmatch(move_str) is not None
 
-def board_to_ascii(board):
-    """Return a simple ASCII representation of the board.
 
-    Uppercase letters represent White pieces, lowercase represent Black.
-    Dots represent empty squares. Ranks are shown from 8 down to 1.
+class RetryReason(IntEnum):
+    """Enumeration of retry reasons with custom messages.
+
+    Reasons are numbered 0, 1, 2, ... so that tables can be indexed by reason.
     """
-    piece_to_char = {
-        chess.PAWN: "p",
-        chess.KNIGHT: "n",
-        chess.BISHOP: "b",
-        chess.ROOK: "r",
-        chess.QUEEN: "q",
-        chess.KING: "k",
-    }
-
-    rows = []
-    for rank in range(7, -1, -1):  # 7 -> 0 corresponds to ranks 8 -> 1
-        row_chars = []
-        for file in range(8):
-            square = chess.square(file, rank)
-            piece = board.piece_at(square)
-            if piece is None:
-                row_chars.append(".")
-            else:
-                char = piece_to_char[piece.piece_type]
-                row_chars.append(char.upper() if piece.color == chess.WHITE else char)
-        rows.append(" ".join(row_chars))
-
-    # Optionally add file labels at the bottom for readability
-    file_labels = "a b c d e f g h"
-    rank_labels_rows = []
-    for idx, row in enumerate(rows):
-        rank_label = str(8 - idx)
-        rank_labels_rows.append(f"{rank_label}  {row}")
-
-    return "\n".join(rank_labels_rows + ["   " + file_labels])
+
+    def __new__(cls, value, message):
+        reason = int.__new__(cls, value)
+        reason._value_ = value
+        reason.message = message  # shown to the user, and used as termination
+        return reason
+
+    EMPTY_RESPONSE = (0, "No response from the model.")
+    INVALID_JSON = (1, "The model didn't return a valid response.")
+    ILLEGAL_MOVE = (2, "The model only proposed illegal moves.")
+    ILLEGAL_MOVE_WRONG_PIECE = (
+        3,
+        "The model tried to move a piece of the wrong color.",
+    )
+    MISSING_CHOICE_KEY = (4, "The model didn't return a valid response.")
+    MISSING_BREAKDOWN_KEY = (5, "The model didn't return a valid response.")
+    MISSING_ANALYSIS_KEY = (6, "The model didn't return a valid response.")
+    INVALID_UCI_FORMAT = (
+        7,
+        "The model didn't respected the imposed response format.",
+    )
+    AUTHENTICATION_FAILED = (
+        8,
+        "Authentication failed. Please verify your API keys.",
+    )
+
+
+# Rank label prefix for each rank index (0 -> "1  ", ..., 7 -> "8  ")
+_RANK_PREFIXES = tuple(f"{rank + 1}  " for rank in range(8))
+
+# File labels at the bottom for readability
+_FILE_LABELS_LINE = "   a b c d e f g h"
+
+
+def render_ascii(chars):
+    """Return the ASCII board from the 64 square characters (a1=0, ..., h8=63)."""
+    rows = [
+        _RANK_PREFIXES[rank] + " ".join(chars[rank * 8 : rank * 8 + 8])
+        for rank in range(7, -1, -1)  # 7 -> 0 corresponds to ranks 8 -> 1
+    ]
+    rows.append(_FILE_LABELS_LINE)
+    return "\n".join(rows)
+
+
+def _build_ascii_template():
+    """Return the empty ASCII board as bytes and the byte offset of each square."""
+    empty_squares = ["."] * 64
+    template = render_ascii(empty_squares).encode("ascii")
+    line_length = len(_RANK_PREFIXES[0]) + len(" ".join(empty_squares[:8])) + 1
+    offsets = tuple(
+        (7 - chess.square_rank(square)) * line_length
+        + len(_RANK_PREFIXES[0])
+        + 2 * chess.square_file(square)
+        for square in chess.SQUARES
+    )
+    return template, offsets
+
+
+_ASCII_TEMPLATE, _ASCII_OFFSETS = _build_ascii_template()
 
 
 def last_uci_from_board(board):
     """Return the last UCI move."""
     if not board.move_stack:
         return "(no move yet, game is just starting)"
-    try:
-        return board.move_stack[-1].uci()
-    except Exception:
-        return "-"
+    return board.peek().uci()
 
 
 SYSTEM_PROMPT = """You are a professional chess player. Your goal is to win the game by making the best possible moves.
@@ -121,44 +147,99 @@ Hard rules:
 - Always consider the opponent’s last move and ensure your king is not in check."""
 
 
+# Bitboards of each piece type, in the order pieces are listed: K, Q, R, B, N, P
+_listed_piece_bitboards = attrgetter(
+    "kings", "queens", "rooks", "bishops", "knights", "pawns"
+)
+
+# Square at each index of a bitboard flipped by chess.flip_diagonal: scanning a
+# flipped bitboard gives the squares in name order (a1, a2, ..., h8)
+_FLIPPED_SQUARES = tuple(
+    chess.square(chess.square_rank(square), chess.square_file(square))
+    for square in chess.SQUARES
+)
+_FLIPPED_SQUARE_NAMES = tuple(chess.SQUARE_NAMES[square] for square in _FLIPPED_SQUARES)
+_FLIPPED_ASCII_OFFSETS = tuple(_ASCII_OFFSETS[square] for square in _FLIPPED_SQUARES)
+
+# Symbols and ASCII codes of the symbols of the listed pieces, White then Black
+_LISTED_PIECES = tuple(
+    (symbols, symbols.encode("ascii")) for symbols in ("KQRBNP", "kqrbnp")
+)
+
+
+def describe_pieces(buckets, symbols):
+    """Return e.g. "K e1 ; R a1 h1" from the sorted square names of each piece.
+
+    symbols gives the symbol of each bucket, e.g. "KQRBNP".
+    """
+    return (
+        " ; ".join(
+            f"{symbol} {' '.join(names)}"
+            for symbol, names in zip(symbols, buckets)
+            if names
+        )
+        or "-"
+    )
+
+
+def placement_key(board):
+    """Return a hashable key of the piece placement, made of the board bitboards.
+
+    The piece bitboards come in the order pieces are listed: K, Q, R, B, N, P.
+    """
+    return (
+        board.occupied_co[chess.WHITE],
+        board.occupied_co[chess.BLACK],
+        *_listed_piece_bitboards(board),
+    )
+
+
+# Openings and transpositions come back often, and lru_cache is thread-safe (the
+# app serves games from many threads)
+@functools.lru_cache(maxsize=4096)
+def placement_context(placement):
+    """Return the ASCII board and the White and Black piece lists of a placement.
+
+    placement is given by placement_key. Both are built in a single pass over the
+    piece bitboards.
+    """
+    white, black, *bitboards = placement
+    buffer = bytearray(_ASCII_TEMPLATE)
+    descriptions = []
+    for mask, (symbols, codes) in zip((white, black), _LISTED_PIECES):
+        buckets = []
+        for bitboard, code in zip(bitboards, codes):
+            names = []
+            for flipped in chess.scan_forward(chess.flip_diagonal(bitboard & mask)):
+                buffer[_FLIPPED_ASCII_OFFSETS[flipped]] = code
+                names.append(_FLIPPED_SQUARE_NAMES[flipped])
+            buckets.append(names)
+        descriptions.append(describe_pieces(buckets, symbols))
+    return (buffer.decode("ascii"), *descriptions)
+
+
+def board_context(board):
+    """Return the ASCII board and the White and Black piece lists of board."""
+    return placement_context(placement_key(board))
+
+
+def board_to_ascii(board):
+    """Return a simple ASCII representation of the board.
+
+    Uppercase letters represent White pieces, lowercase represent Black.
+    Dots represent empty squares. Ranks are shown from 8 down to 1.
+    """
+    return board_context(board)[0]
+
+
 def build_user_prompt(board):
     """Return the user prompt with clear, compact board context."""
     color_str = "White" if board.turn == chess.WHITE else "Black"
     last_uci = last_uci_from_board(board)
-    ascii_board_str = board_to_ascii(board)
-
-    def piece_lists(board):
-        pieces_positions = {}
-
-        for position, piece in board.piece_map().items():
-            piece_symbol = piece.symbol()
-            if piece_symbol not in pieces_positions:
-                pieces_positions[piece_symbol] = []
-            position_name = chess.square_name(position)
-            pieces_positions[piece_symbol].append(position_name)
-
-        white_description = (
-            " ; ".join(
-                f"{symbol} {' '.join(sorted(pieces_positions.get(symbol, [])))}"
-                for symbol in "KQRBNP"
-                if pieces_positions.get(symbol)
-            )
-            or "-"
-        )
-
-        black_description = (
-            " ; ".join(
-                f"{symbol} {' '.join(sorted(pieces_positions.get(symbol, [])))}"
-                for symbol in "kqrbnp"
-                if pieces_positions.get(symbol)
-            )
-            or "-"
-        )
-
-        return white_description, black_description
 
-    white_pieces_str, black_pieces_str = piece_lists(board)
+    ascii_board_str, white_pieces_str, black_pieces_str = board_context(board)
 
+    # A single f-string: the constant parts are not parsed again on each call
     return (
         f"You play {color_str} and it's your turn.\n"
         f"Opponent just played {last_uci}.\n"
@@ -169,45 +250,7 @@ def build_user_prompt(board):
     )
 
 
-def build_retry_message(reason, attempted=None, is_in_check=None):
-    """Return a detailed retry instruction for the assistant.
-
-    The returned string is meant to be appended as a new user message to
-    steer the next attempt toward a valid, legal, and well-formed answer.
-    """
-    pattern = "^[a-h][1-8][a-h][1-8][qrbn]?$"
-
-    if reason == RetryReason.ILLEGAL_MOVE:
-        check_message = ""
-        if is_in_check:
-            check_message = " Your king is currently in check. You must make a move to resolve the check."
-        if attempted:
-            return (
-                f"The move '{attempted}' is illegal and cannot be played in the current position.{check_message} "
-                "Verify square by square if you can move the piece from the from-square to the target square. "
-                "Be sure to check your king isn't in check after the move. "
-                "Please analyze the board again and provide a legal move in UCI format. "
-                "Return ONLY the JSON object."
-            )
-        return (
-            f"Your previous move was illegal.{check_message} Please choose a legal move and return it "
-            "in the JSON format."
-        )
-
-    if reason == RetryReason.ILLEGAL_MOVE_WRONG_PIECE:
-        if attempted:
-            return f"""The move '{attempted}' is illegal because it moves a piece to your opponent.
-            You can only move your own pieces. Please analyze the board again and provide a legal move in UCI format.
-            Return ONLY the JSON object."""
-        return (
-            "The move you selected is illegal because it moves a piece that belongs to your opponent. "
-            "You can only move your own pieces. Please analyze the board again and provide a legal move in UCI format. "
-            "Return ONLY the JSON object."
-        )
-
-    if reason == RetryReason.INVALID_UCI_FORMAT:
-        if attempted:
-            return f"""The move '{attempted}' is not valid UCI. It must match {pattern}. UCI is from-square + to-square (+ optional promotion piece). Do NOT include 'x', '+', '-' or piece letters. For captures, just write the to-square.
+_UCI_FORMAT_HELP = """{subject} is not valid UCI. It must match {pattern}. UCI is from-square + to-square (+ optional promotion piece). Do NOT include 'x', '+', '-' or piece letters. For captures, just write the to-square.
 
 Bad examples and corrections:
 - 'd4xe5' -> 'd4e5'
@@ -219,21 +262,10 @@ Valid examples:
 - 'e2e4', 'd4e5', 'g1f3', 'c1g5', 'e7e8q' (promotion).
 
 Return ONLY the JSON object."""
-        return f"""The 'choice' value is not valid UCI. It must match {pattern}. UCI is from-square + to-square (+ optional promotion piece). Do NOT include 'x', '+', '-' or piece letters. For captures, just write the to-square.
-
-Bad examples and corrections:
-- 'd4xe5' -> 'd4e5'
-- 'Nf3' -> 'g1f3'
-- 'Nb8d7' -> 'b8d7'
-- 'e2-e4' -> 'e2e4'
-
-Valid examples:
-- 'e2e4', 'd4e5', 'g1f3', 'c1g5', 'e7e8q' (promotion).
 
-Return ONLY the JSON object."""
+_MISSING_KEY_MESSAGE = "Your JSON is missing the required '{key}' key. Return a JSON object with 'analysis', 'breakdown', and 'choice' keys."
 
-    if reason == RetryReason.INVALID_JSON:
-        return """Your output was not valid JSON or contained extra text. Return ONLY one JSON object that starts with '{' and ends with '}', with absolutely no text before or after it. The JSON must have keys in this exact order: 'analysis', 'breakdown', 'choice'. Do not use code fences or text before or after the JSON.
+_INVALID_JSON_MESSAGE = """Your output was not valid JSON or contained extra text. Return ONLY one JSON object that starts with '{' and ends with '}', with absolutely no text before or after it. The JSON must have keys in this exact order: 'analysis', 'breakdown', 'choice'. Do not use code fences or text before or after the JSON.
 
 Valid output example:
 {
@@ -243,15 +275,126 @@ Valid output example:
 }
 """
 
-    if reason == RetryReason.MISSING_CHOICE_KEY:
-        return "Your JSON is missing the required 'choice' key. Return a JSON object with 'analysis', 'breakdown', and 'choice' keys."
+_CHECK_MESSAGE = (
+    " Your king is currently in check. You must make a move to resolve the check."
+)
+
+# Retry message templates of each reason, as (template when the attempted move is
+# known, template otherwise). They are filled with str.format(attempted=...,
+# check_message=...), so literal braces are doubled.
+_RETRY_TEMPLATES = {
+    RetryReason.ILLEGAL_MOVE: (
+        "The move '{attempted}' is illegal and cannot be played in the current position.{check_message} "
+        "Verify square by square if you can move the piece from the from-square to the target square. "
+        "Be sure to check your king isn't in check after the move. "
+        "Please analyze the board again and provide a legal move in UCI format. "
+        "Return ONLY the JSON object.",
+        "Your previous move was illegal.{check_message} Please choose a legal move and return it "
+        "in the JSON format.",
+    ),
+    RetryReason.ILLEGAL_MOVE_WRONG_PIECE: (
+        """The move '{attempted}' is illegal because it moves a piece to your opponent.
+            You can only move your own pieces. Please analyze the board again and provide a legal move in UCI format.
+            Return ONLY the JSON object.""",
+        "The move you selected is illegal because it moves a piece that belongs to your opponent. "
+        "You can only move your own pieces. Please analyze the board again and provide a legal move in UCI format. "
+        "Return ONLY the JSON object.",
+    ),
+    RetryReason.INVALID_UCI_FORMAT: (
+        _UCI_FORMAT_HELP.format(subject="The move '{attempted}'", pattern=UCI_PATTERN),
+        _UCI_FORMAT_HELP.format(subject="The 'choice' value", pattern=UCI_PATTERN),
+    ),
+    RetryReason.INVALID_JSON: (
+        _INVALID_JSON_MESSAGE.replace("{", "{{").replace("}", "}}"),
+    )
+    * 2,
+    RetryReason.MISSING_CHOICE_KEY: (_MISSING_KEY_MESSAGE.format(key="choice"),) * 2,
+    RetryReason.MISSING_BREAKDOWN_KEY: (_MISSING_KEY_MESSAGE.format(key="breakdown"),)
+    * 2,
+    RetryReason.MISSING_ANALYSIS_KEY: (_MISSING_KEY_MESSAGE.format(key="analysis"),)
+    * 2,
+    # Not used anymore
+    # RetryReason.EMPTY_RESPONSE: (
+    #     "Your response was empty. Return ONLY a single JSON object matching the schema (no extra text).",
+    # )
+    # * 2,
+}
 
-    if reason == RetryReason.MISSING_BREAKDOWN_KEY:
-        return "Your JSON is missing the required 'breakdown' key. Return a JSON object with 'analysis', 'breakdown', and 'choice' keys."
+_COMPACT_FORMAT_REMINDER = (
+    " Return ONLY one JSON object with the keys 'analysis', 'breakdown', 'choice'."
+)
+
+# One-line variants of the templates, for models that only need to be told what
+# was wrong: fewer tokens to read on every retry
+_COMPACT_RETRY_TEMPLATES = {
+    RetryReason.ILLEGAL_MOVE: (
+        "Illegal move '{attempted}'.{check_message} Choose a legal move in UCI format.",
+        "Illegal move.{check_message} Choose a legal move in UCI format.",
+    ),
+    RetryReason.ILLEGAL_MOVE_WRONG_PIECE: (
+        "Illegal move '{attempted}': it moves a piece of your opponent.",
+        "Illegal move: it moves a piece of your opponent.",
+    ),
+    RetryReason.INVALID_UCI_FORMAT: (
+        "Invalid UCI move '{attempted}': it must match "
+        + UCI_PATTERN
+        + " (e.g. 'e2e4', 'e7e8q').",
+        "Invalid UCI move: it must match " + UCI_PATTERN + " (e.g. 'e2e4', 'e7e8q').",
+    ),
+    RetryReason.INVALID_JSON: ("Invalid JSON." + _COMPACT_FORMAT_REMINDER,) * 2,
+    RetryReason.MISSING_CHOICE_KEY: (
+        "Missing 'choice' key." + _COMPACT_FORMAT_REMINDER,
+    )
+    * 2,
+    RetryReason.MISSING_BREAKDOWN_KEY: (
+        "Missing 'breakdown' key." + _COMPACT_FORMAT_REMINDER,
+    )
+    * 2,
+    RetryReason.MISSING_ANALYSIS_KEY: (
+        "Missing 'analysis' key." + _COMPACT_FORMAT_REMINDER,
+    )
+    * 2,
+}
 
-    if reason == RetryReason.MISSING_ANALYSIS_KEY:
-        return "Your JSON is missing the required 'analysis' key. Return a JSON object with 'analysis', 'breakdown', and 'choice' keys."
 
-    # Not used anymore
-    # if reason == RetryReason.EMPTY_RESPONSE:
-    #     return "Your response was empty. Return ONLY a single JSON object matching the schema (no extra text)."
+def _retry_handler(templates):
+    """Return a function building the retry message of a reason from its templates."""
+    if templates is None:
+        return lambda attempted, is_in_check: None
+    with_attempted, without_attempted = templates
+    if with_attempted == without_attempted and all(
+        field is None for _, field, _, _ in string.Formatter().parse(with_attempted)
+    ):
+        # Nothing to fill in: format it once
+        message = with_attempted.format()
+        return lambda attempted, is_in_check: message
+
+    def handler(attempted, is_in_check):
+        template = with_attempted if attempted else without_attempted
+        return template.format(
+            attempted=attempted, check_message=_CHECK_MESSAGE if is_in_check else ""
+        )
+
+    return handler
+
+
+# Retry message builders, indexed by compact flag and then by reason
+_RETRY_HANDLERS = (
+    tuple(_retry_handler(_RETRY_TEMPLATES.get(reason)) for reason in RetryReason),
+    tuple(
+        _retry_handler(_COMPACT_RETRY_TEMPLATES.get(reason)) for reason in RetryReason
+    ),
+)
+
+
+# Models tend to repeat the same mistakes, so the same messages come back often.
+# Bounded: 'attempted' is whatever the model answered.
+@functools.lru_cache(maxsize=1024)
+def build_retry_message(reason, attempted=None, is_in_check=None, compact=False):
+    """Return a detailed retry instruction for the assistant.
+
+    The returned string is meant to be appended as a new user message to
+    steer the next attempt toward a valid, legal, and well-formed answer.
+    With compact=True, a one-line message only states what was wrong.
+    """
+    return _RETRY_HANDLERS[bool(compact)][reason](attempted, is_in_check)
@@ -1,9 +1,15 @@
 """Update Elo ratings."""
 
+import math
+import atexit
+from collections import Counter
+
 from gcp import read_json_from_gcs, write_json_to_gcs
 
 # K-factor controls how fast ratings move.
 RATINGS_FILE = "ratings.json"
+# 10**(x / 400) == exp(x * ln(10) / 400)
+LN10_OVER_400 = math.log(10) / 400
 
 
 def get_k_factor(total_games):
@@ -18,10 +24,18 @@ def get_k_factor(total_games):
         return 16
 
 
+def games_played(player_data):
+    """Return the number of games played by a player, from its ratings entry."""
+    return (
+        player_data.get("wins", 0)
+        + player_data.get("draws", 0)
+        + player_data.get("losses", 0)
+    )
+
+
 def expected_score(rating_a, rating_b):
     """Return how much we expect A to score vs B (number between 0 and 1)."""
-    exponent = (rating_b - rating_a) / 400
-    return 1 / (1 + 10**exponent)
+    return 1 / (1 + math.exp((rating_b - rating_a) * LN10_OVER_400))
 
 
 def update_elo(rating_a, rating_b, score_a, k_a, k_b):
@@ -31,9 +45,9 @@ def update_elo(rating_a, rating_b, score_a, k_a, k_b):
     k_a and k_b are the K-factors for each player.
     """
     exp_a = expected_score(rating_a, rating_b)
-    exp_b = expected_score(rating_b, rating_a)
     new_a = rating_a + k_a * (score_a - exp_a)
-    new_b = rating_b + k_b * ((1 - score_a) - exp_b)
+    # B expects 1 - exp_a and scores 1 - score_a
+    new_b = rating_b + k_b * (exp_a - score_a)
     return new_a, new_b
 
 
@@ -43,14 +57,24 @@ class RatingsTable:
     - By default, new models start at 1200.
     - Use get/set to read and write values.
     - Use apply_result to apply a PGN-like result string ("1-0", "0-1", "1/2-1/2").
+    - Results are kept in memory until flush() writes them to GCS.
     """
 
     def __init__(self, default_rating=1200):
         self.default_rating = default_rating
+        self.dirty = False
         self.load_ratings()
+        # Don't lose the results applied since the last flush
+        atexit.register(self.flush)
 
     def load_ratings(self):
+        # Pending results would be overwritten by the stored ratings
+        self.flush()
         self.ratings = read_json_from_gcs(RATINGS_FILE)
+        # Reason counts are kept as Counters (written to JSON as plain objects)
+        for player_data in self.ratings.values():
+            for reason in ["win_reasons", "loss_reasons"]:
+                player_data[reason] = Counter(player_data.get(reason))
 
     def get(self, player_id):
         player_data = self.ratings.get(player_id)
@@ -68,8 +92,8 @@ class RatingsTable:
                 "moves": 0,
                 "time": 0.0,
                 "cost": 0.0,
-                "win_reasons": {},
-                "loss_reasons": {},
+                "win_reasons": Counter(),
+                "loss_reasons": Counter(),
             }
         else:
             self.ratings[player_id]["rating"] = rating
@@ -147,69 +171,65 @@ class RatingsTable:
         if black_id not in self.ratings:
             self.set(black_id, self.default_rating)
 
-        # Get total games played BEFORE this match
-        white_games = self.get_stats(white_id)["total"]
-        black_games = self.get_stats(black_id)["total"]
+        white = self.ratings[white_id]
+        black = self.ratings[black_id]
 
-        white_rating = self.get(white_id)
-        black_rating = self.get(black_id)
+        # Get total games played BEFORE this match
+        white_games = games_played(white)
+        black_games = games_played(black)
 
-        # Ensure reason maps exist
-        for model_id in [white_id, black_id]:
-            for reason in ["win_reasons", "loss_reasons"]:
-                if reason not in self.ratings[model_id]:
-                    self.ratings[model_id][reason] = {}
+        white_rating = white.get("rating", self.default_rating)
+        black_rating = black.get("rating", self.default_rating)
 
         if result == "1-0":
             score_white = 1
             # White wins, black loses
-            self.ratings[white_id]["wins"] += 1
-            self.ratings[black_id]["losses"] += 1
+            white["wins"] += 1
+            black["losses"] += 1
             if termination:
-                self.ratings[white_id]["win_reasons"][termination] = (
-                    self.ratings[white_id]["win_reasons"].get(termination, 0) + 1
-                )
-                self.ratings[black_id]["loss_reasons"][termination] = (
-                    self.ratings[black_id]["loss_reasons"].get(termination, 0) + 1
-                )
+                white["win_reasons"][termination] += 1
+                black["loss_reasons"][termination] += 1
         elif result == "0-1":
             score_white = 0
             # Black wins, white loses
-            self.ratings[black_id]["wins"] += 1
-            self.ratings[white_id]["losses"] += 1
+            black["wins"] += 1
+            white["losses"] += 1
             if termination:
-                self.ratings[black_id]["win_reasons"][termination] = (
-                    self.ratings[black_id]["win_reasons"].get(termination, 0) + 1
-                )
-                self.ratings[white_id]["loss_reasons"][termination] = (
-                    self.ratings[white_id]["loss_reasons"].get(termination, 0) + 1
-                )
+                black["win_reasons"][termination] += 1
+                white["loss_reasons"][termination] += 1
         else:
             score_white = 0.5
             # Draw for both
-            self.ratings[white_id]["draws"] += 1
-            self.ratings[black_id]["draws"] += 1
+            white["draws"] += 1
+            black["draws"] += 1
 
         # Update statistics
-        self.ratings[white_id]["moves"] += white_moves
-        self.ratings[white_id]["time"] += white_time
-        self.ratings[white_id]["cost"] += white_cost
+        white["moves"] += white_moves
+        white["time"] += white_time
+        white["cost"] += white_cost
 
-        self.ratings[black_id]["moves"] += black_moves
-        self.ratings[black_id]["time"] += black_time
-        self.ratings[black_id]["cost"] += black_cost
+        black["moves"] += black_moves
+        black["time"] += black_time
+        black["cost"] += black_cost
 
         # Get K-factors
         k_white = get_k_factor(white_games)
         k_black = get_k_factor(black_games)
 
         # Update ratings
-        new_white, new_black = update_elo(
+        white["rating"], black["rating"] = update_elo(
             white_rating, black_rating, score_white, k_white, k_black
         )
-        self.set(white_id, new_white)
-        self.set(black_id, new_black)
         self.save()
 
     def save(self):
-        write_json_to_gcs(RATINGS_FILE, self.ratings)
+        """Mark the ratings as changed, to be written by the next flush()."""
+        self.dirty = True
+
+    def flush(self):
+        """Write the ratings to GCS if they changed since the last write."""
+        if self.dirty:
+            # Cleared first: a result applied during the upload marks it again
+            self.dirty = False
+            # Mostly repeated keys: compresses to a fraction of its size
+            write_json_to_gcs(RATINGS_FILE, self.ratings, compress=True)
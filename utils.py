@@ -2,6 +2,9 @@
 
 import os
 
+# Models read from each file, with the modification time and size of the file
+models_cache = {}
+
 
 def read_models_from_file(path):
     """Read one model id per non-empty, non-comment line.
@@ -14,38 +17,46 @@ def read_models_from_file(path):
     'name' is the display name if provided, otherwise it's None.
     'tags' is a list of tag strings if provided, otherwise it's an empty list.
     If the file doesn't exist, returns [].
+
+    The file is only parsed again when it changes: the returned dicts are shared
+    between calls and must not be modified.
     """
-    if not os.path.exists(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
         return []
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = models_cache.get(path)
+    if cached is None or cached[0] != version:
+        cached = (version, parse_models_file(path))
+        models_cache[path] = cached
+    return list(cached[1])
+
+
+def parse_models_file(path):
+    """Parse a models file, see read_models_from_file for the format."""
     models = []
     with open(path, "r", encoding="utf-8") as f:
         for line in f:
             line = line.strip()
-            if line and not line.startswith("#"):
-                model_id = None
-                display_name = None
-                tags = []
-
-                # Look for tags first (they are enclosed in brackets)
-                if "[" in line and "]" in line:
-                    # Find the tag section
-                    tag_start = line.rfind("[")
-                    tag_end = line.rfind("]")
-                    if tag_start < tag_end:
-                        tag_part = line[tag_start : tag_end + 1]
-                        tag_content = tag_part[1:-1]  # Remove brackets
-                        if tag_content:
-                            tags = [tag.strip() for tag in tag_content.split(",")]
-                        # Remove the tag part from the line for further processing
-                        line = line[:tag_start].strip().rstrip(",").strip()
-
-                if "," in line:
-                    # Split by comma
-                    parts = line.split(",", 1)  # Split only on first comma
-                    model_id = parts[0].strip()
-                    display_name = parts[1].strip() if len(parts) > 1 else None
-                else:
-                    model_id = line
-
-                models.append({"id": model_id, "name": display_name, "tags": tags})
+            if not line or line.startswith("#"):
+                continue
+            tags = []
+            # Tags are enclosed in brackets, at the end of the line
+            tag_start = line.rfind("[")
+            tag_end = line.rfind("]")
+            if -1 < tag_start < tag_end:
+                tag_content = line[tag_start + 1 : tag_end]
+                if tag_content:
+                    tags = [tag.strip() for tag in tag_content.split(",")]
+                line = line[:tag_start].rstrip().rstrip(",").rstrip()
+            # Split only on the first comma: display names can contain commas
+            model_id, comma, display_name = line.partition(",")
+            models.append(
+                {
+                    "id": model_id.strip(),
+                    "name": display_name.strip() if comma else None,
+                    "tags": tags,
+                }
+            )
     return models